@@ -9,11 +9,12 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import plotly.figure_factory as ff
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-import seaborn as sns
-import io
+import os
+import re
+import textwrap
 import warnings
+from dataclasses import dataclass
+from types import MappingProxyType
 
 warnings.filterwarnings("ignore")
 
@@ -183,95 +184,112 @@ def warning_note(text: str):
     st.markdown(f'<div class="warning-box">⚠️ {text}</div>', unsafe_allow_html=True)
 
 
+def session_figure(name: str, key, build):
+    """
+    Figure `name` kept in st.session_state and rebuilt only when `key` changes.
+    One figure is stored per chart, so memory does not grow with filter changes.
+    """
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] != key:
+        cached = (key, build())
+        st.session_state[name] = cached
+    return cached[1]
+
+
+def scatter(data: pd.DataFrame, **kwargs):
+    """px.scatter using the renderer chosen in the sidebar (WebGL by default)."""
+    return px.scatter(data, render_mode=st.session_state.get("render_mode", "webgl"), **kwargs)
+
+
 # =============================================================================
 # DATA LOADING & PREPROCESSING
 # =============================================================================
 
-@st.cache_data(show_spinner=False)
-def load_and_preprocess(filepath: str) -> pd.DataFrame:
+DATA_FILE = "water_dataX .csv"
+
+# Friendly rename map  (raw header, stripped + lower-cased → clean)
+COLUMN_MAP = {
+    "station code":                         "station_code",
+    "locations":                            "location",
+    "state":                                "state",
+    "temp":                                 "temp",
+    "d.o. (mg/l)":                          "do_mg_l",
+    "ph":                                   "ph",
+    "conductivity (µhos/cm)":               "conductivity",
+    "conductivity (痠hos/cm)":               "conductivity",   # µ mis-encoded in CPCB export
+    "b.o.d. (mg/l)":                        "bod_mg_l",
+    "nitratenan n+ nitritenann (mg/l)":     "nitrate_mg_l",
+    "fecal coliform (mpn/100ml)":           "fecal_coliform",
+    "total coliform (mpn/100ml)mean":       "total_coliform",
+    "year":                                 "year",
+}
+
+
+def clean_column_name(col: str) -> str:
+    """Map a raw CSV header to its clean name (unknown headers → snake_case)."""
+    key = col.strip().lower()
+    if key in COLUMN_MAP:
+        return COLUMN_MAP[key]
+    return re.sub(r"[^a-z0-9]+", "_", key).strip("_")
+
+
+@st.cache_data(persist="disk", show_spinner=False)
+def load_and_preprocess(filepath: str, mtime: float) -> pd.DataFrame:
     """
-    Load raw CSV, clean and enrich it, save processed version.
-    Returns the processed DataFrame.
+    Load raw CSV, clean and enrich it.
+    Returns the processed DataFrame. `mtime` (file modification time) is only
+    part of the cache key, so an edited CSV is reprocessed; the result is
+    persisted to disk and survives app restarts.
     """
-    # --- 1. Load ---
-    df = pd.read_csv(filepath)
-
-    # --- 2. Standardise column names (lowercase + underscore) ---
-    df.columns = (
-        df.columns
-        .str.strip()
-        .str.lower()
-        .str.replace(r"[^a-z0-9]+", "_", regex=True)
-        .str.strip("_")
-    )
+    # --- 1. Load (multi-threaded pyarrow parser; 'NAN' strings are read as nulls) ---
+    df = pd.read_csv(filepath, engine="pyarrow")
 
-    # Friendly rename map  (raw → clean)
-    rename_map = {
-        "station_code":                         "station_code",
-        "locations":                            "location",
-        "state":                                "state",
-        "temp":                                 "temp",
-        "d_o_mg_l":                             "do_mg_l",
-        "ph":                                   "ph",
-        "conductivity_hos_cm":                  "conductivity",
-        "b_o_d_mg_l":                           "bod_mg_l",
-        "nitratenan_n_nitritenann_mg_l":        "nitrate_mg_l",
-        "fecal_coliform_mpn_100ml":             "fecal_coliform",
-        "total_coliform_mpn_100ml_mean":        "total_coliform",
-        "year":                                 "year",
-    }
-    # Apply only the keys that actually exist
-    rename_map = {k: v for k, v in rename_map.items() if k in df.columns}
-    df.rename(columns=rename_map, inplace=True)
+    # --- 2. Standardise column names (raw header → clean name) ---
+    df.rename(columns=clean_column_name, inplace=True)
 
-    # --- 3. Convert year → datetime ---
+    # --- 3. Convert year → datetime (Int16 year; cache=True parses each distinct year once) ---
     if "year" in df.columns:
-        df["year"] = pd.to_numeric(df["year"], errors="coerce")
-        df["date"] = pd.to_datetime(df["year"], format="%Y")
+        df["year"] = pd.to_numeric(df["year"], errors="coerce").astype("Int16")
+        df["date"] = pd.to_datetime(df["year"].astype("string"), format="%Y",
+                                    cache=True, errors="coerce")
 
-    # --- 4. Replace string 'NAN' / 'nan' with numpy NaN, coerce numerics ---
+    # --- 4. Coerce numerics (strings such as 'NAN' / 'nan' become NaN) ---
     num_cols = ["temp", "do_mg_l", "ph", "conductivity", "bod_mg_l",
                 "nitrate_mg_l", "fecal_coliform", "total_coliform"]
-    for col in num_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col].astype(str).str.strip()
-                                             .str.upper()
-                                             .replace("NAN", np.nan),
-                                    errors="coerce")
+    num_cols_present = [c for c in num_cols if c in df.columns]
+    df[num_cols_present] = df[num_cols_present].apply(pd.to_numeric, errors="coerce")
+    # Station codes are integer IDs (the pyarrow reader yields float64 when some are missing)
+    if "station_code" in df.columns:
+        df["station_code"] = pd.to_numeric(df["station_code"], errors="coerce").astype("Int64")
 
     # --- 5. Remove duplicates ---
     df.drop_duplicates(inplace=True)
 
-    # --- 6. Impute missing values ---
-    for col in num_cols:
-        if col in df.columns:
-            df[col].fillna(df[col].median(), inplace=True)
+    # --- 6. Impute missing values (column medians, one block operation) ---
+    df[num_cols_present] = df[num_cols_present].fillna(df[num_cols_present].median())
 
     # --- 7. Derived column – ph_status ---
-    def classify_ph(val):
-        if pd.isna(val):
-            return "Unknown"
-        if val < 6.5:
-            return "Acidic"
-        elif val <= 8.5:
-            return "Neutral"
-        else:
-            return "Alkaline"
-
-    df["ph_status"] = df["ph"].apply(classify_ph) if "ph" in df.columns else "Unknown"
+    # np.select keeps the exact boundaries (< 6.5 / ≤ 8.5); NaN matches nothing → "Unknown"
+    if "ph" in df.columns:
+        ph = df["ph"].to_numpy()
+        df["ph_status"] = np.select(
+            [ph < 6.5, ph <= 8.5, ph > 8.5],
+            ["Acidic", "Neutral", "Alkaline"],
+            default="Unknown",
+        )
+    else:
+        df["ph_status"] = "Unknown"
 
     # --- 8. Derived column – ec_level (µhos/cm thresholds) ---
-    def classify_ec(val):
-        if pd.isna(val):
-            return "Unknown"
-        if val < 250:
-            return "Low"
-        elif val <= 750:
-            return "Medium"
-        else:
-            return "High"
-
-    df["ec_level"] = df["conductivity"].apply(classify_ec) if "conductivity" in df.columns else "Unknown"
+    if "conductivity" in df.columns:
+        ec = df["conductivity"].to_numpy()
+        df["ec_level"] = np.select(
+            [ec < 250, ec <= 750, ec > 750],
+            ["Low", "Medium", "High"],
+            default="Unknown",
+        )
+    else:
+        df["ec_level"] = "Unknown"
 
     # --- 9. Derived column – compliance_status (BIS / WHO drinking-water norms) ---
     # BIS IS:10500 / WHO guidelines:
@@ -279,26 +297,66 @@ def load_and_preprocess(filepath: str) -> pd.DataFrame:
     #   DO      : ≥ 5 mg/l
     #   BOD     : ≤ 3 mg/l
     #   FC      : ≤ 500 MPN/100 ml
-    def check_compliance(row):
-        flags = []
-        if "ph" in row and not (6.5 <= row["ph"] <= 8.5):
-            flags.append("pH")
-        if "do_mg_l" in row and row["do_mg_l"] < 5:
-            flags.append("DO")
-        if "bod_mg_l" in row and row["bod_mg_l"] > 3:
-            flags.append("BOD")
-        if "fecal_coliform" in row and row["fecal_coliform"] > 500:
-            flags.append("FC")
-        return "Non-Compliant" if flags else "Compliant"
-
-    df["compliance_status"] = df.apply(check_compliance, axis=1)
-
-    # --- 10. Save processed CSV ---
-    df.to_csv("processed_water_data.csv", index=False)
+    # Vectorised: OR together one boolean mask per available parameter
+    bad = np.zeros(len(df), dtype=bool)
+    if "ph" in df.columns:
+        ph = df["ph"].to_numpy()
+        bad |= ~((ph >= 6.5) & (ph <= 8.5))
+    if "do_mg_l" in df.columns:
+        bad |= df["do_mg_l"].to_numpy() < 5
+    if "bod_mg_l" in df.columns:
+        bad |= df["bod_mg_l"].to_numpy() > 3
+    if "fecal_coliform" in df.columns:
+        bad |= df["fecal_coliform"].to_numpy() > 500
+
+    df["compliance_status"] = np.where(bad, "Non-Compliant", "Compliant")
+
+    # --- 10. Downcast measurements to float32 (halves memory) ---
+    # float32 holds ~7 significant digits (integers exactly only up to 2**24), which
+    # covers the physico-chemical readings; coliform MPN counts reach 9 digits and
+    # stay float64 so their values are not rounded.
+    f32_cols = [c for c in num_cols_present if c not in ("fecal_coliform", "total_coliform")]
+    df[f32_cols] = df[f32_cols].astype("float32")
+
+    # --- 11. Low-cardinality text columns → categorical (integer codes, less memory) ---
+    # Filtered slices keep every category: counts over them include zero rows, which
+    # consumers drop before plotting (see compliance_counts)
+    for col in ["station_code", "state", "ec_level", "compliance_status"]:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    df["ph_status"] = df["ph_status"].astype(
+        pd.CategoricalDtype(["Acidic", "Neutral", "Alkaline", "Unknown"], ordered=True)
+    )
 
     return df
 
 
+@st.cache_data(show_spinner=False)
+def compute_missing_summary(filepath: str, mtime: float) -> pd.DataFrame:
+    """
+    Missing-value counts / percentages per column of the *raw* CSV.
+    Only columns with at least one missing value are returned.
+    """
+    raw_df = pd.read_csv(filepath)
+    raw_df.rename(columns=clean_column_name, inplace=True)
+    # Replace string NANs in a single pass
+    raw_df.replace({"NAN": np.nan, "nan": np.nan}, inplace=True)
+
+    counts = raw_df.isnull().sum()
+    missing = pd.DataFrame({
+        "Column": counts.index,
+        "Missing Count": counts.values,
+        "Missing %": (counts.values / len(raw_df) * 100).round(2),
+    })
+    return missing[missing["Missing Count"] > 0].sort_values("Missing %", ascending=False)
+
+
+@st.cache_data(show_spinner=False)
+def get_csv_bytes(data_mtime: float, _df: pd.DataFrame) -> bytes:
+    """UTF-8 CSV of the processed dataset for the download buttons (keyed on data mtime)."""
+    return _df.to_csv(index=False).encode("utf-8")
+
+
 # =============================================================================
 # STATE → LAT/LON LOOKUP  (approximate centroids)
 # =============================================================================
@@ -341,14 +399,17 @@ STATE_COORDS = {
     "ANDAMAN & NICOBAR ISLANDS": (11.7401, 92.6586),
     "CHANDIGARH": (30.7333, 76.7794),
 }
+# Split lookups so Series.map can take a plain dict (hashed in C, no lambda per row)
+STATE_LAT = {s: lat for s, (lat, _) in STATE_COORDS.items()}
+STATE_LON = {s: lon for s, (_, lon) in STATE_COORDS.items()}
 
 
 def add_map_coords(df: pd.DataFrame) -> pd.DataFrame:
     """Add lat/lon columns from state lookup."""
     df = df.copy()
     df["state_upper"] = df["state"].str.strip().str.upper()
-    df["lat"] = df["state_upper"].map(lambda s: STATE_COORDS.get(s, (np.nan, np.nan))[0])
-    df["lon"] = df["state_upper"].map(lambda s: STATE_COORDS.get(s, (np.nan, np.nan))[1])
+    df["lat"] = df["state_upper"].map(STATE_LAT).astype("float32")
+    df["lon"] = df["state_upper"].map(STATE_LON).astype("float32")
     return df
 
 
@@ -356,24 +417,618 @@ def add_map_coords(df: pd.DataFrame) -> pd.DataFrame:
 # ANOMALY DETECTION  (Z-score based)
 # =============================================================================
 
-def detect_anomalies(df: pd.DataFrame, col: str, threshold: float = 3.0) -> pd.DataFrame:
-    """Flag rows where |z-score| > threshold as anomalies."""
-    s = df[col].dropna()
-    z = (df[col] - s.mean()) / s.std()
-    df[f"{col}_anomaly"] = z.abs() > threshold
+ANOMALY_PARAMS = ["ph", "conductivity", "bod_mg_l", "do_mg_l", "fecal_coliform"]
+
+
+def detect_anomalies(df: pd.DataFrame, cols: list, threshold: float = 3.0) -> pd.DataFrame:
+    """
+    Add a boolean `<col>_anomaly` column for each of `cols`, flagging rows
+    where |z-score| > threshold. All columns are handled in one batch:
+    (N, k) array → column-wise mean/std → (N, k) flags.
+    """
+    a = df[cols].to_numpy(dtype=float)
+    mean = np.nanmean(a, axis=0)
+    std = np.nanstd(a, axis=0, ddof=1)   # ddof=1 → sample std, as pandas
+    df[[f"{c}_anomaly" for c in cols]] = np.abs(a - mean) > threshold * std
+    return df
+
+
+@st.cache_data(show_spinner=False)
+def enrich(data_mtime: float, _df: pd.DataFrame) -> pd.DataFrame:
+    """Add map coordinates and anomaly flags (computed once per data mtime)."""
+    df = add_map_coords(_df)
+    cols = [c for c in ANOMALY_PARAMS if c in df.columns]
+    if cols:
+        df = detect_anomalies(df, cols)
     return df
 
 
+# =============================================================================
+# PRE-AGGREGATES  (per state × year, sliced by the sidebar filters)
+# =============================================================================
+AGG_COLS = ["ph", "conductivity", "do_mg_l", "bod_mg_l", "fecal_coliform"]
+
+
+@st.cache_data(show_spinner=False)
+def state_year_agg(data_mtime: float, _df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sum / count / min / max of each parameter per (state, year), plus state
+    coordinates. Means for any state/year selection are Σsum / Σcount, so the
+    dashboard never has to re-aggregate the row-level data on a filter change.
+    Cached on the data file's mtime rather than by hashing the frame.
+    """
+    spec = {c: ["sum", "count", "min", "max"] for c in AGG_COLS if c in _df.columns}
+    spec.update({"lat": ["first"], "lon": ["first"]})
+    return _df.groupby(["state", "year"], observed=True, dropna=False).agg(spec)
+
+
+def select_agg(agg: pd.DataFrame, states: list, years: tuple) -> pd.DataFrame:
+    """Rows of `state_year_agg` matching the sidebar filters (all states if none picked)."""
+    yr = agg.index.get_level_values("year")
+    keep = (yr >= years[0]) & (yr <= years[1])
+    if states:
+        keep &= agg.index.get_level_values("state").isin(states)
+    return agg[keep]
+
+
+def state_totals(sel_agg: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse selected (state, year) pre-aggregates to one row per state:
+    sums/counts are added, coordinates taken as first. Works directly on the
+    factorised state codes (np.bincount) instead of a pandas groupby.
+    """
+    codes, states = pd.factorize(sel_agg.index.get_level_values("state"), sort=True)
+    valid = codes >= 0                       # rows without a state are dropped, as in groupby
+    codes, n = codes[valid], len(states)
+    _, first_row = np.unique(codes, return_index=True)
+
+    out = {}
+    for c in sel_agg.columns:
+        values = sel_agg[c].to_numpy(dtype=float)[valid]
+        if c[1] == "first":
+            out[c] = values[first_row]
+        elif c[1] in ("sum", "count"):
+            out[c] = np.bincount(codes, weights=values, minlength=n)
+    return pd.DataFrame(out, index=pd.Index(states, name="state"))
+
+
+# =============================================================================
+# CACHED SELECTIONS  (keyed on filters_key = (data mtime, states, year range))
+# =============================================================================
+# Only the most recent selections are kept; older ones are recomputed on demand
+MAX_SELECTIONS = 8
+
+
+@st.cache_resource(show_spinner=False, max_entries=MAX_SELECTIONS)
+def filter_data(filters_key: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rows of the master frame matching the sidebar filters (all states if none picked).
+    Held as a shared resource, so callers get the slice itself (no per-rerun copy)
+    and must treat it as read-only.
+    """
+    _, states, years = filters_key
+    mask = _df["year"].between(years[0], years[1]).to_numpy(dtype=bool, na_value=False)
+    if states:
+        mask &= _df["state"].isin(states).to_numpy()
+    return _df.loc[mask]
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_SELECTIONS)
+def chart_aggregates(filters_key: tuple, _agg: pd.DataFrame) -> tuple:
+    """
+    (Chart 1 pH trend, Chart 2 EC by state, per-state totals for the map)
+    from the cached `state_year_agg` table.
+    """
+    _, states, years = filters_key
+    sel_agg = select_agg(_agg, list(states), years)
+
+    ph_year = (
+        sel_agg["ph"].groupby(level="year")
+        .agg({"sum": "sum", "count": "sum", "min": "min", "max": "max"})
+    )
+    ph_trend = pd.DataFrame({
+        "year": ph_year.index,
+        "Avg pH": (ph_year["sum"] / ph_year["count"]).to_numpy(),
+        "Min pH": ph_year["min"].to_numpy(),
+        "Max pH": ph_year["max"].to_numpy(),
+    })
+
+    state_tot = state_totals(sel_agg)   # shared by Charts 2 and 5
+    ec_state = (
+        (state_tot[("conductivity", "sum")] / state_tot[("conductivity", "count")])
+        .rename("Avg EC")
+        .reset_index()
+        .sort_values("Avg EC", ascending=False)
+        .head(20)
+    )
+    return ph_trend, ec_state, state_tot
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_SELECTIONS)
+def state_map_data(filters_key: tuple, map_param: str, _state_tot: pd.DataFrame) -> pd.DataFrame:
+    """Chart 5: state-wise average of `map_param` with map coordinates."""
+    return (
+        pd.DataFrame({
+            "value": _state_tot[(map_param, "sum")] / _state_tot[(map_param, "count")],
+            "lat": _state_tot[("lat", "first")],
+            "lon": _state_tot[("lon", "first")],
+        })
+        .reset_index()
+        .dropna(subset=["lat", "lon"])
+    )
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_SELECTIONS)
+def correlation_data(filters_key: tuple, _dff: pd.DataFrame) -> pd.DataFrame:
+    """Chart 4: Pearson correlation, lower triangle only (upper + diagonal NaN)."""
+    heat_cols = [c for c in ["ph", "do_mg_l", "bod_mg_l", "conductivity",
+                              "nitrate_mg_l", "fecal_coliform", "total_coliform", "temp"]
+                 if c in _dff.columns]
+    m = np.ascontiguousarray(_dff[heat_cols].to_numpy(dtype=np.float32))
+    m = m[~np.isnan(m).any(axis=1)]
+    with np.errstate(invalid="ignore", divide="ignore"):   # constant column -> NaN, as pandas
+        corr = np.corrcoef(m, rowvar=False)
+    np.round(corr, 2, out=corr)
+    corr[np.triu_indices_from(corr)] = np.nan   # hide redundant upper triangle + diagonal
+    return pd.DataFrame(corr, index=heat_cols, columns=heat_cols)
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_SELECTIONS)
+def compliance_counts(filters_key: tuple, _dff: pd.DataFrame) -> pd.DataFrame:
+    """Chart 3: sample count per compliance status."""
+    status = _dff["compliance_status"]
+    codes = status.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(status.cat.categories))
+    comp_counts = pd.DataFrame({"Status": status.cat.categories, "Count": counts})
+    comp_counts = comp_counts[comp_counts["Count"] > 0]   # no empty slices in the pie
+    return comp_counts.sort_values("Count", ascending=False, kind="stable", ignore_index=True)
+
+
+@st.cache_data(show_spinner=False, max_entries=2)   # only the current selection is downloaded
+def filtered_csv_bytes(filters_key: tuple, _dff: pd.DataFrame) -> bytes:
+    """UTF-8 CSV of the filtered frame, serialised once per filter selection."""
+    return _dff.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data(show_spinner=False, max_entries=MAX_SELECTIONS)
+def dashboard_kpis(filters_key: tuple, _dff: pd.DataFrame) -> tuple:
+    """
+    (avg pH, avg EC, avg DO, % non-compliant) for the KPI cards.
+    Cached on `filters_key` only – the filtered frame itself is not hashed.
+    """
+    cols = [c for c in ["ph", "conductivity", "do_mg_l"] if c in _dff.columns]
+    means = _dff[cols].mean()
+    pct_nc = (
+        _dff["compliance_status"].eq("Non-Compliant").mean() * 100
+        if "compliance_status" in _dff.columns
+        else 0
+    )
+    return (float(means.get("ph", 0)), float(means.get("conductivity", 0)),
+            float(means.get("do_mg_l", 0)), float(pct_nc))
+
+
+@st.cache_data(show_spinner=False)
+def sidebar_options(data_mtime: float, _df: pd.DataFrame) -> tuple:
+    """Sorted unique states and years for the sidebar filters."""
+    return (
+        sorted(_df["state"].dropna().unique().tolist()),
+        sorted(_df["year"].dropna().astype(int).unique().tolist()),
+    )
+
+
+# =============================================================================
+# FIGURE BUILDERS  (Section 3 – results are kept via session_figure)
+# =============================================================================
+
+def build_ph_trend_fig(ph_trend: pd.DataFrame) -> go.Figure:
+    """Chart 1: yearly average pH with min/max band."""
+    fig1 = go.Figure()
+    fig1.add_trace(go.Scatter(
+        x=ph_trend["year"], y=ph_trend["Max pH"],
+        fill=None, mode="lines", line=dict(color="rgba(21,101,192,0.2)"),
+        name="Max pH", showlegend=True,
+    ))
+    fig1.add_trace(go.Scatter(
+        x=ph_trend["year"], y=ph_trend["Min pH"],
+        fill="tonexty", mode="lines", line=dict(color="rgba(21,101,192,0.2)"),
+        name="Min pH", fillcolor="rgba(21,101,192,0.12)",
+    ))
+    fig1.add_trace(go.Scatter(
+        x=ph_trend["year"], y=ph_trend["Avg pH"],
+        mode="lines+markers", line=dict(color="#1565c0", width=3),
+        marker=dict(size=8, color="#1565c0"), name="Avg pH",
+    ))
+    fig1.add_hline(y=6.5, line_dash="dash", line_color="#e53935",
+                   annotation_text="BIS Lower (6.5)", annotation_position="bottom right")
+    fig1.add_hline(y=8.5, line_dash="dash", line_color="#e53935",
+                   annotation_text="BIS Upper (8.5)", annotation_position="top right")
+    fig1.update_layout(
+        title="Average pH Trend Over Years (with Range Band)",
+        xaxis_title="Year", yaxis_title="pH",
+        plot_bgcolor="white", paper_bgcolor="white",
+        legend=dict(orientation="h", y=-0.2),
+        height=420,
+    )
+    return fig1
+
+
+def build_ec_state_fig(ec_state: pd.DataFrame) -> go.Figure:
+    """Chart 2: top states by average conductivity."""
+    fig2 = px.bar(
+        ec_state, x="Avg EC", y="state", orientation="h",
+        color="Avg EC", color_continuous_scale="Teal",
+        labels={"Avg EC": "Avg EC (µhos/cm)", "state": "State"},
+        title="Top States by Average Electrical Conductivity",
+    )
+    fig2.update_traces(texttemplate="%{x:.0f}", textposition="outside")
+    fig2.add_vline(x=250, line_dash="dot", line_color="#43a047",
+                   annotation_text="Low/Medium boundary (250)")
+    fig2.add_vline(x=750, line_dash="dot", line_color="#e53935",
+                   annotation_text="Medium/High boundary (750)")
+    fig2.update_layout(
+        plot_bgcolor="white", paper_bgcolor="white",
+        yaxis=dict(autorange="reversed"), height=520,
+        coloraxis_showscale=False,
+    )
+    return fig2
+
+
+def build_compliance_fig(comp_counts: pd.DataFrame) -> go.Figure:
+    """Chart 3: compliant vs non-compliant samples."""
+    fig3 = px.pie(
+        comp_counts, names="Status", values="Count",
+        color="Status",
+        color_discrete_map={"Compliant": "#2e7d32", "Non-Compliant": "#c62828"},
+        title="Water Sample Compliance with BIS/WHO Standards",
+        hole=0.42,
+    )
+    fig3.update_traces(
+        textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}",
+        pull=[0.03, 0.03],
+    )
+    fig3.update_layout(
+        height=420,
+        legend=dict(orientation="h", y=-0.1),
+        annotations=[dict(text="Compliance", x=0.5, y=0.5,
+                          font_size=14, showarrow=False)],
+    )
+    return fig3
+
+
+def build_corr_fig(corr_df: pd.DataFrame) -> go.Figure:
+    """Chart 4: lower-triangle correlation heatmap (upper triangle already NaN)."""
+    fig4 = px.imshow(
+        corr_df, text_auto=".2f", aspect="auto",
+        color_continuous_scale="RdYlGn", zmin=-1, zmax=1,
+        title="Pearson Correlation Between Water Quality Parameters",
+    )
+    fig4.update_xaxes(showgrid=False)
+    fig4.update_yaxes(showgrid=False)
+    fig4.update_layout(plot_bgcolor="white", paper_bgcolor="white", height=520)
+    return fig4
+
+
+def build_map_fig(map_data: pd.DataFrame, map_param: str) -> go.Figure:
+    """
+    Chart 5: state-wise average of `map_param` on the India map.
+    Hover text is formatted by Plotly from the colour values, no extra column.
+    """
+    fig5 = px.scatter_mapbox(
+        map_data, lat="lat", lon="lon", size="value",
+        color="value",
+        color_continuous_scale="RdYlGn_r" if map_param in ["bod_mg_l", "fecal_coliform"] else "RdYlGn",
+        hover_name="state",
+        size_max=45,
+        zoom=4,
+        center={"lat": 22.5, "lon": 82.0},
+        title=f"State-wise Average {map_param.upper()} Across India",
+        labels={"value": map_param},
+        mapbox_style="carto-positron",
+        height=560,
+    )
+    fig5.update_traces(
+        hovertemplate="<b>%{hovertext}</b><br>Avg Value: %{marker.color:.2f}<extra></extra>"
+    )
+    fig5.update_layout(margin={"r": 0, "t": 40, "l": 0, "b": 0})
+    return fig5
+
+
+def build_bod_violin_fig(dff: pd.DataFrame) -> go.Figure:
+    """Chart 6: BOD distribution per pH status."""
+    fig6 = px.violin(
+        dff, x="ph_status", y="bod_mg_l",
+        color="ph_status",
+        box=True, points="outliers",
+        color_discrete_map={"Acidic": "#ef5350", "Neutral": "#42a5f5", "Alkaline": "#66bb6a"},
+        title="BOD Distribution Across pH Status Categories",
+        labels={"bod_mg_l": "BOD (mg/l)", "ph_status": "pH Status"},
+        category_orders={"ph_status": ["Acidic", "Neutral", "Alkaline"]},
+        height=440,
+    )
+    fig6.update_layout(plot_bgcolor="white", paper_bgcolor="white", showlegend=False)
+    return fig6
+
+
+MAX_SCATTER_POINTS = 5000   # normal (non-anomaly) points drawn by Chart 7
+
+
+def build_anomaly_fig(dff: pd.DataFrame, anomaly_param: str) -> go.Figure:
+    """
+    Chart 7: values over years, anomalies highlighted. Normal points beyond
+    MAX_SCATTER_POINTS are thinned by a per-year sample; anomalies are all kept.
+    """
+    anom_col = f"{anomaly_param}_anomaly"
+    dff = dff[["year", anomaly_param, anom_col, "state", "location"]]   # only plotted columns
+    normal = ~dff[anom_col].to_numpy()
+    n_normal = int(normal.sum())
+    if n_normal > MAX_SCATTER_POINTS:
+        sampled = (
+            dff[normal]
+            .groupby("year", observed=True)
+            .sample(frac=MAX_SCATTER_POINTS / n_normal, random_state=0)
+        )
+        dff = pd.concat([dff[~normal], sampled]).sort_index()
+    fig7 = scatter(
+        dff, x="year", y=anomaly_param,
+        color=anom_col,
+        color_discrete_map={True: "#c62828", False: "#1565c0"},
+        symbol=anom_col,
+        symbol_map={True: "x", False: "circle"},
+        opacity=0.7,
+        title=f"Anomaly Detection — {anomaly_param} (red × = anomaly, |z| > 3)",
+        labels={anomaly_param: anomaly_param.upper(),
+                "year": "Year", anom_col: "Anomaly"},
+        hover_data=["state", "location"],
+        height=440,
+    )
+    fig7.update_layout(plot_bgcolor="white", paper_bgcolor="white")
+    return fig7
+
+
+# =============================================================================
+# GOVERNMENT INITIATIVES  (Section 4 content – static, rendered once per process)
+# =============================================================================
+@dataclass(frozen=True, slots=True)
+class Initiative:
+    """One Section 4 card: expander heading, ministry banner and bullet points."""
+    icon: str
+    title: str
+    ministry: str
+    color: str
+    points: tuple
+
+
+INITIATIVES: tuple = (
+    Initiative(
+        icon="🌊",
+        title="Namami Gange Programme (NMCG)",
+        ministry="Ministry of Jal Shakti | Budget: ₹20,000 Cr | Launched: 2015",
+        color="#1565c0",
+        points=(
+            "Flagship mission for comprehensive conservation and rejuvenation of River Ganga.",
+            "Covers sewage treatment plant (STP) construction with total capacity of 5,000+ MLD.",
+            "Afforestation of 30,000 hectares along the Ganga basin.",
+            "Ghat development and beautification across 97 towns.",
+            "Real-time water quality monitoring via online continuous monitoring systems (OCMS).",
+            "Industrial units prohibited from discharging untreated effluents.",
+            "Biodiversity conservation — Gangetic Dolphin as flagship species.",
+        ),
+    ),
+    Initiative(
+        icon="🚰",
+        title="Jal Jeevan Mission (JJM)",
+        ministry="Ministry of Jal Shakti | Budget: ₹3.60 Lakh Cr | Launched: 2019",
+        color="#2e7d32",
+        points=(
+            "Har Ghar Jal — tap water connection to every rural household by 2024.",
+            "As of 2025, over 14 crore (140 million) households connected.",
+            "Establishes 5-member Village Water & Sanitation Committees (VWSCs).",
+            "Water quality testing labs at district and sub-district levels.",
+            "Field testing kits (FTKs) distributed to grassroots workers (Swajal Sahayikas).",
+            "Source sustainability through aquifer management and rainwater harvesting.",
+            "Monitoring through JJM Dashboard and IoT-based sensors.",
+        ),
+    ),
+    Initiative(
+        icon="🔬",
+        title="National Water Quality Monitoring Programme (NWQMP – CPCB)",
+        ministry="CPCB, MoEFCC | Est: 1978 | Stations: 2,500+",
+        color="#00838f",
+        points=(
+            "Monitors 507 rivers, 154 lakes, 25 tanks, 17 ponds, 45 reservoirs and 10 creeks.",
+            "2,500+ monitoring stations across 28 states and 7 UTs.",
+            "Parameters monitored: temperature, pH, DO, BOD, coliforms, heavy metals, pesticides.",
+            "Monthly / quarterly sampling by State Pollution Control Boards (SPCBs).",
+            "Data published annually through CPCB reports and India-WRIS portal.",
+            "Basis for river classification (Class A to E) under BIS IS:2296.",
+        ),
+    ),
+    Initiative(
+        icon="🏗️",
+        title="State Pollution Control Boards (SPCBs)",
+        ministry="Constituted under Water Act, 1974",
+        color="#6a1b9a",
+        points=(
+            "Each state has its own SPCB / Pollution Control Committee (PCC).",
+            "Issue Consents to Establish (CTE) and Consents to Operate (CTO) to industries.",
+            "Enforce effluent discharge standards (ZLD norms for water-intensive sectors).",
+            "Monitor common effluent treatment plants (CETPs) in industrial clusters.",
+            "Coordinate with CPCB on national programs and data submission.",
+            "Impose closure orders and penalties for violations under EP Act, 1986.",
+        ),
+    ),
+    Initiative(
+        icon="⚖️",
+        title="Water (Prevention & Control of Pollution) Act, 1974",
+        ministry="Parliament of India | Amended: 1988",
+        color="#c62828",
+        points=(
+            "First comprehensive legislation to prevent and control water pollution in India.",
+            "Established CPCB at the central level and SPCBs at state level.",
+            "Prohibits discharge of polluting matter into streams, wells, sewers or land.",
+            "Section 25/26: Any new/existing industrial discharge requires SPCB consent.",
+            "Penalties: imprisonment up to 6 years + fine for violations.",
+            "Amended in 1988 to enhance penalty provisions.",
+            "Supplemented by the Environment Protection Act, 1986 for hazardous substances.",
+        ),
+    ),
+    Initiative(
+        icon="🌿",
+        title="Atal Bhujal Yojana (ABY)",
+        ministry="Ministry of Jal Shakti | Budget: ₹6,000 Cr | Launched: 2020",
+        color="#558b2f",
+        points=(
+            "Community-led groundwater management in 7 water-stressed states.",
+            "States: Gujarat, Haryana, Karnataka, Madhya Pradesh, Maharashtra, Rajasthan, UP.",
+            "Focuses on water budgeting at Gram Panchayat level.",
+            "Promotes demand-side management and groundwater recharge.",
+            "Incentive-based framework — states rewarded for reducing extraction.",
+        ),
+    ),
+)
+
+
+def initiative_html(item: Initiative) -> str:
+    """Ministry banner plus bullet points of one initiative as a single HTML block."""
+    parts = [
+        f"""
+        <div style="background:#f5f5f5;border-radius:8px;padding:8px 14px;
+                    margin-bottom:10px;font-size:13px;color:#546e7a;">
+            📌 <b>{item.ministry}</b>
+        </div>
+        """
+    ]
+    for point in item.points:
+        parts.append(
+            f"""
+            <div style="display:flex;align-items:flex-start;margin:6px 0;">
+                <span style="color:{item.color};font-size:18px;margin-right:10px;
+                             line-height:1.4;">▸</span>
+                <span style="font-size:14.5px;color:#37474f;line-height:1.6;">{point}</span>
+            </div>
+            """
+        )
+    return "\n".join(textwrap.dedent(p) for p in parts)
+
+
+# Built once at import; rendered as-is inside each expander
+INITIATIVES_HTML = tuple(initiative_html(item) for item in INITIATIVES)
+
+
+TIMELINE_DF = pd.DataFrame(
+    {
+        "Year": [1974, 1978, 1986, 1991, 2011, 2015, 2019, 2020, 2022],
+        "Event": [
+            "Water Act enacted",
+            "NWQMP launched by CPCB",
+            "Environment Protection Act",
+            "Ganga Action Plan II",
+            "National Water Policy revised",
+            "Namami Gange Programme",
+            "Jal Jeevan Mission launched",
+            "Atal Bhujal Yojana",
+            "JJM — Urban extended",
+        ],
+        "Category": [
+            "Legislation", "Monitoring", "Legislation",
+            "River Cleaning", "Policy",
+            "River Cleaning", "Rural Water Supply",
+            "Groundwater", "Urban Water Supply",
+        ],
+    }
+)
+TIMELINE_COLORS = MappingProxyType({
+    "Legislation": "#c62828",
+    "Monitoring": "#1565c0",
+    "River Cleaning": "#2e7d32",
+    "Policy": "#6a1b9a",
+    "Rural Water Supply": "#00838f",
+    "Groundwater": "#558b2f",
+    "Urban Water Supply": "#0277bd",
+})
+
+
+@st.cache_resource(show_spinner=False)
+def timeline_fig(render_mode: str) -> go.Figure:
+    """Section 4 policy timeline; built once per renderer and shared across sessions."""
+    fig_tl = px.scatter(
+        TIMELINE_DF, x="Year", y="Category",
+        color="Category", size=[15] * len(TIMELINE_DF),
+        hover_data=["Event"],
+        color_discrete_map=dict(TIMELINE_COLORS),
+        title="Indian Water Policy & Initiative Timeline",
+        height=380, render_mode=render_mode,
+    )
+    fig_tl.update_traces(marker=dict(symbol="diamond", size=16))
+    annotations = [
+        dict(
+            x=year, y=category,
+            text=event, showarrow=True,
+            arrowhead=2, ax=0, ay=-30,
+            font=dict(size=10, color="#37474f"),
+            bgcolor="white", bordercolor="#bdbdbd", borderwidth=1,
+        )
+        for year, category, event in zip(
+            TIMELINE_DF["Year"].tolist(),
+            TIMELINE_DF["Category"].tolist(),
+            TIMELINE_DF["Event"].tolist(),
+        )
+    ]
+    fig_tl.update_layout(
+        plot_bgcolor="white", paper_bgcolor="white",
+        showlegend=False,
+        xaxis=dict(tickmode="linear", dtick=5),
+        annotations=annotations,
+    )
+    return fig_tl
+
+
+# =============================================================================
+# CONCLUSION CONTENT  (Section 5 – static, rendered once per process)
+# =============================================================================
+TECH_ITEMS = [
+    ("🛰️", "Remote Sensing & GIS",
+     "Satellite imagery detects algal blooms, turbidity changes and illegal discharge plumes "
+     "across large river basins without physical access."),
+    ("📡", "IoT & Real-time Sensors",
+     "Online Continuous Monitoring Systems (OCMS) installed on rivers and STPs transmit "
+     "live pH, DO, BOD and turbidity data to cloud dashboards."),
+    ("🤖", "Machine Learning & AI",
+     "Predictive models trained on historical water-quality data can forecast pollution events, "
+     "enabling proactive intervention by pollution control authorities."),
+    ("📊", "Open Data & Dashboards",
+     "Platforms like India-WRIS, CPCB data portal and apps like this one enable citizens, "
+     "researchers and policymakers to visualise and act on water-quality information."),
+    ("⚗️", "Advanced Treatment Tech",
+     "Membrane bioreactors (MBR), UV disinfection, and nano-filtration are being deployed "
+     "in Namami Gange STPs to achieve near-zero pollutant discharge."),
+]
+
+
+# One HTML card per TECH_ITEMS entry, in order; built once at import
+TECH_CARDS_HTML = tuple(
+    f"""
+    <div style="background:white;border-radius:12px;padding:16px;
+                box-shadow:0 3px 10px rgba(0,0,0,0.09);text-align:center;height:100%;">
+        <div style="font-size:36px;margin-bottom:8px;">{icon}</div>
+        <div style="font-weight:700;color:#1565c0;font-size:13px;
+                    margin-bottom:8px;">{title}</div>
+        <div style="font-size:12px;color:#546e7a;line-height:1.6;">{desc}</div>
+    </div>
+    """
+    for icon, title, desc in TECH_ITEMS
+)
+
+
 # =============================================================================
 # LOAD DATA
 # =============================================================================
 
 with st.spinner("⏳  Loading and preprocessing data …"):
-    df = load_and_preprocess("water_dataX .csv")
-    df = add_map_coords(df)
-    for c in ["ph", "conductivity", "bod_mg_l", "do_mg_l", "fecal_coliform"]:
-        if c in df.columns:
-            df = detect_anomalies(df, c)
+    data_mtime = os.path.getmtime(DATA_FILE)
+    processed_df = load_and_preprocess(DATA_FILE, data_mtime)
+    df = enrich(data_mtime, processed_df)
 
 # =============================================================================
 # SIDEBAR NAVIGATION
@@ -410,12 +1065,11 @@ st.sidebar.markdown("---")
 # ---- Global Filters (used in Dashboard section) ----
 st.sidebar.markdown("**🔍 Filters**")
 
-all_states = sorted(df["state"].dropna().unique().tolist())
+all_states, all_years = sidebar_options(data_mtime, df)
 sel_states = st.sidebar.multiselect(
     "Select State(s)", all_states, default=all_states[:5], key="state_filter"
 )
 
-all_years = sorted(df["year"].dropna().astype(int).unique().tolist())
 year_range = st.sidebar.slider(
     "Year Range",
     min_value=int(all_years[0]),
@@ -424,24 +1078,31 @@ year_range = st.sidebar.slider(
     key="year_filter",
 )
 
+# ---- Chart rendering ----
+st.sidebar.markdown("---")
+st.sidebar.markdown("**⚙️ Rendering**")
+st.sidebar.radio(
+    "Scatter renderer", ["webgl", "svg"], horizontal=True, key="render_mode",
+    help="WebGL draws points on the GPU and stays fast with thousands of points.",
+)
+
 # ---- Download processed data ----
 st.sidebar.markdown("---")
 st.sidebar.markdown("**⬇️ Downloads**")
 
-with open("processed_water_data.csv", "rb") as fh:
-    st.sidebar.download_button(
-        label="📥 Processed Dataset",
-        data=fh,
-        file_name="processed_water_data.csv",
-        mime="text/csv",
-    )
+st.sidebar.download_button(
+    label="📥 Processed Dataset",
+    data=get_csv_bytes(data_mtime, processed_df),
+    file_name="processed_water_data.csv",
+    mime="text/csv",
+)
 
 # ---- Apply filters ----
-mask = pd.Series([True] * len(df), index=df.index)
-if sel_states:
-    mask &= df["state"].isin(sel_states)
-mask &= df["year"].between(year_range[0], year_range[1])
-dff = df[mask].copy()
+# Cheap, hashable identity of the selection; caches key on it instead of hashing frames
+filters_key = (data_mtime, tuple(sel_states), tuple(year_range))
+# dff is a cache_resource object shared by every session: never write to it in place
+# (take a .copy() or .assign() first), or other users' views are corrupted
+dff = filter_data(filters_key, df)
 
 
 # =============================================================================
@@ -641,22 +1302,7 @@ elif nav == SECTIONS[1]:
 
     # ---- Missing value analysis ----
     st.subheader("🕳️ Missing Value Analysis (Original Dataset)")
-    raw_df = pd.read_csv("water_dataX .csv")
-    raw_df.columns = (
-        raw_df.columns.str.strip().str.lower()
-        .str.replace(r"[^a-z0-9]+", "_", regex=True).str.strip("_")
-    )
-    # Replace string NANs  
-    raw_df.replace("NAN", np.nan, inplace=True)
-    raw_df.replace("nan", np.nan, inplace=True)
-
-    missing = (
-        raw_df.isnull().sum()
-        .reset_index()
-        .rename(columns={"index": "Column", 0: "Missing Count"})
-    )
-    missing["Missing %"] = (missing["Missing Count"] / len(raw_df) * 100).round(2)
-    missing = missing[missing["Missing Count"] > 0].sort_values("Missing %", ascending=False)
+    missing = compute_missing_summary(DATA_FILE, data_mtime)
 
     if missing.empty:
         st.success("✅ No missing values found in the dataset after initial load.")
@@ -679,13 +1325,12 @@ elif nav == SECTIONS[1]:
 
     # ---- Download processed data ----
     st.subheader("⬇️ Download Processed Data")
-    with open("processed_water_data.csv", "rb") as fh:
-        st.download_button(
-            label="📥 Download processed_water_data.csv",
-            data=fh,
-            file_name="processed_water_data.csv",
-            mime="text/csv",
-        )
+    st.download_button(
+        label="📥 Download processed_water_data.csv",
+        data=get_csv_bytes(data_mtime, processed_df),
+        file_name="processed_water_data.csv",
+        mime="text/csv",
+    )
 
 
 # =============================================================================
@@ -701,18 +1346,13 @@ elif nav == SECTIONS[2]:
         st.warning("No data matches the selected filters. Please adjust sidebar filters.")
         st.stop()
 
+    ph_trend, ec_state, state_tot = chart_aggregates(filters_key, state_year_agg(data_mtime, df))
+
     # ==== KPI METRICS ====
     st.markdown("#### 📌 Key Performance Indicators")
     k1, k2, k3, k4 = st.columns(4)
 
-    avg_ph = dff["ph"].mean() if "ph" in dff.columns else 0
-    avg_ec = dff["conductivity"].mean() if "conductivity" in dff.columns else 0
-    avg_do = dff["do_mg_l"].mean() if "do_mg_l" in dff.columns else 0
-    pct_nc = (
-        (dff["compliance_status"] == "Non-Compliant").sum() / len(dff) * 100
-        if "compliance_status" in dff.columns
-        else 0
-    )
+    avg_ph, avg_ec, avg_do, pct_nc = dashboard_kpis(filters_key, dff)
 
     for col, lbl, val, sub, color in zip(
         [k1, k2, k3, k4],
@@ -741,39 +1381,7 @@ elif nav == SECTIONS[2]:
 
     # ==== CHART 1 – pH Trend over Years ====
     st.subheader("📈 Chart 1: pH Trend Over Years")
-    ph_trend = (
-        dff.groupby("year")["ph"]
-        .agg(["mean", "min", "max"])
-        .reset_index()
-        .rename(columns={"mean": "Avg pH", "min": "Min pH", "max": "Max pH"})
-    )
-    fig1 = go.Figure()
-    fig1.add_trace(go.Scatter(
-        x=ph_trend["year"], y=ph_trend["Max pH"],
-        fill=None, mode="lines", line=dict(color="rgba(21,101,192,0.2)"),
-        name="Max pH", showlegend=True,
-    ))
-    fig1.add_trace(go.Scatter(
-        x=ph_trend["year"], y=ph_trend["Min pH"],
-        fill="tonexty", mode="lines", line=dict(color="rgba(21,101,192,0.2)"),
-        name="Min pH", fillcolor="rgba(21,101,192,0.12)",
-    ))
-    fig1.add_trace(go.Scatter(
-        x=ph_trend["year"], y=ph_trend["Avg pH"],
-        mode="lines+markers", line=dict(color="#1565c0", width=3),
-        marker=dict(size=8, color="#1565c0"), name="Avg pH",
-    ))
-    fig1.add_hline(y=6.5, line_dash="dash", line_color="#e53935",
-                   annotation_text="BIS Lower (6.5)", annotation_position="bottom right")
-    fig1.add_hline(y=8.5, line_dash="dash", line_color="#e53935",
-                   annotation_text="BIS Upper (8.5)", annotation_position="top right")
-    fig1.update_layout(
-        title="Average pH Trend Over Years (with Range Band)",
-        xaxis_title="Year", yaxis_title="pH",
-        plot_bgcolor="white", paper_bgcolor="white",
-        legend=dict(orientation="h", y=-0.2),
-        height=420,
-    )
+    fig1 = session_figure("fig_ph_trend", filters_key, lambda: build_ph_trend_fig(ph_trend))
     st.plotly_chart(fig1, use_container_width=True)
     insight(
         "pH remained mostly within the BIS safe range of 6.5–8.5 across years. "
@@ -784,31 +1392,7 @@ elif nav == SECTIONS[2]:
 
     # ==== CHART 2 – EC Bar Chart (location-wise) ====
     st.subheader("📊 Chart 2: Average Conductivity (EC) by State")
-    ec_state = (
-        dff.groupby("state")["conductivity"]
-        .mean()
-        .reset_index()
-        .rename(columns={"conductivity": "Avg EC"})
-        .sort_values("Avg EC", ascending=False)
-        .head(20)
-    )
-    fig2 = px.bar(
-        ec_state, x="Avg EC", y="state", orientation="h",
-        color="Avg EC", color_continuous_scale="Teal",
-        labels={"Avg EC": "Avg EC (µhos/cm)", "state": "State"},
-        title="Top States by Average Electrical Conductivity",
-        text="Avg EC",
-    )
-    fig2.update_traces(texttemplate="%{text:.0f}", textposition="outside")
-    fig2.add_vline(x=250, line_dash="dot", line_color="#43a047",
-                   annotation_text="Low/Medium boundary (250)")
-    fig2.add_vline(x=750, line_dash="dot", line_color="#e53935",
-                   annotation_text="Medium/High boundary (750)")
-    fig2.update_layout(
-        plot_bgcolor="white", paper_bgcolor="white",
-        yaxis=dict(autorange="reversed"), height=520,
-        coloraxis_showscale=False,
-    )
+    fig2 = session_figure("fig_ec_state", filters_key, lambda: build_ec_state_fig(ec_state))
     st.plotly_chart(fig2, use_container_width=True)
     insight(
         "States with high EC indicate elevated dissolved salts — possibly from industrial "
@@ -819,25 +1403,9 @@ elif nav == SECTIONS[2]:
 
     # ==== CHART 3 – Compliance Pie Chart ====
     st.subheader("🥧 Chart 3: Compliance vs Non-Compliance (BIS/WHO)")
-    comp_counts = dff["compliance_status"].value_counts().reset_index()
-    comp_counts.columns = ["Status", "Count"]
-    fig3 = px.pie(
-        comp_counts, names="Status", values="Count",
-        color="Status",
-        color_discrete_map={"Compliant": "#2e7d32", "Non-Compliant": "#c62828"},
-        title="Water Sample Compliance with BIS/WHO Standards",
-        hole=0.42,
-    )
-    fig3.update_traces(
-        textinfo="percent+label",
-        hovertemplate="<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}",
-        pull=[0.03, 0.03],
-    )
-    fig3.update_layout(
-        height=420,
-        legend=dict(orientation="h", y=-0.1),
-        annotations=[dict(text="Compliance", x=0.5, y=0.5,
-                          font_size=14, showarrow=False)],
+    fig3 = session_figure(
+        "fig_compliance", filters_key,
+        lambda: build_compliance_fig(compliance_counts(filters_key, dff)),
     )
     st.plotly_chart(fig3, use_container_width=True)
     warning_note(
@@ -849,25 +1417,10 @@ elif nav == SECTIONS[2]:
 
     # ==== CHART 4 – Correlation Heatmap ====
     st.subheader("🌡️ Chart 4: Parameter Correlation Heatmap")
-    heat_cols = [c for c in ["ph", "do_mg_l", "bod_mg_l", "conductivity",
-                              "nitrate_mg_l", "fecal_coliform", "total_coliform", "temp"]
-                 if c in dff.columns]
-    corr_df = dff[heat_cols].corr().round(2)
-
-    fig4, ax4 = plt.subplots(figsize=(10, 7))
-    mask = np.triu(np.ones_like(corr_df, dtype=bool))
-    sns.heatmap(
-        corr_df, mask=mask, annot=True, fmt=".2f", ax=ax4,
-        cmap="RdYlGn", center=0, linewidths=0.6,
-        linecolor="#eeeeee",
-        annot_kws={"size": 10},
-        cbar_kws={"shrink": 0.8},
+    fig4 = session_figure(
+        "fig_corr", filters_key, lambda: build_corr_fig(correlation_data(filters_key, dff))
     )
-    ax4.set_title("Pearson Correlation Between Water Quality Parameters",
-                  fontsize=14, fontweight="bold", pad=14)
-    plt.tight_layout()
-    st.pyplot(fig4)
-    plt.close(fig4)
+    st.plotly_chart(fig4, use_container_width=True)
     insight(
         "BOD and Fecal Coliform are typically strongly correlated — both are driven by "
         "organic / sewage inputs. Negative DO–BOD correlation indicates oxygen depletion."
@@ -891,30 +1444,10 @@ elif nav == SECTIONS[2]:
         key="map_param",
     )
 
-    map_data = (
-        dff.groupby("state")[[map_param, "lat", "lon"]]
-        .agg({map_param: "mean", "lat": "first", "lon": "first"})
-        .reset_index()
-        .dropna(subset=["lat", "lon"])
-    )
-    map_data.rename(columns={map_param: "value"}, inplace=True)
-    map_data["value_fmt"] = map_data["value"].round(2)
-
-    fig5 = px.scatter_mapbox(
-        map_data, lat="lat", lon="lon", size="value",
-        color="value",
-        color_continuous_scale="RdYlGn_r" if map_param in ["bod_mg_l", "fecal_coliform"] else "RdYlGn",
-        hover_name="state",
-        hover_data={"value_fmt": True, "lat": False, "lon": False},
-        size_max=45,
-        zoom=4,
-        center={"lat": 22.5, "lon": 82.0},
-        title=f"State-wise Average {map_param.upper()} Across India",
-        labels={"value": map_param, "value_fmt": "Avg Value"},
-        mapbox_style="carto-positron",
-        height=560,
+    fig5 = session_figure(
+        "fig_map", (filters_key, map_param),
+        lambda: build_map_fig(state_map_data(filters_key, map_param, state_tot), map_param),
     )
-    fig5.update_layout(margin={"r": 0, "t": 40, "l": 0, "b": 0})
     st.plotly_chart(fig5, use_container_width=True)
     insight(
         "Bubble size and colour indicate the severity of the selected parameter. "
@@ -925,17 +1458,7 @@ elif nav == SECTIONS[2]:
 
     # ==== CHART 6 – BOD Distribution by pH Status ====
     st.subheader("🎻 Chart 6: BOD Distribution by pH Status")
-    fig6 = px.violin(
-        dff, x="ph_status", y="bod_mg_l",
-        color="ph_status",
-        box=True, points="outliers",
-        color_discrete_map={"Acidic": "#ef5350", "Neutral": "#42a5f5", "Alkaline": "#66bb6a"},
-        title="BOD Distribution Across pH Status Categories",
-        labels={"bod_mg_l": "BOD (mg/l)", "ph_status": "pH Status"},
-        category_orders={"ph_status": ["Acidic", "Neutral", "Alkaline"]},
-        height=440,
-    )
-    fig6.update_layout(plot_bgcolor="white", paper_bgcolor="white", showlegend=False)
+    fig6 = session_figure("fig_bod_violin", filters_key, lambda: build_bod_violin_fig(dff))
     st.plotly_chart(fig6, use_container_width=True)
     insight(
         "Acidic waters tend to have higher BOD — indicating greater organic pollution "
@@ -948,43 +1471,29 @@ elif nav == SECTIONS[2]:
     st.subheader("🔴 Chart 7: Anomaly Detection (Z-score ≥ 3σ)")
     anomaly_param = st.selectbox(
         "Select parameter for anomaly view",
-        [c for c in ["ph", "conductivity", "bod_mg_l", "do_mg_l", "fecal_coliform"]
-         if c in dff.columns],
+        [c for c in ANOMALY_PARAMS if c in dff.columns],
         key="anomaly_param",
     )
-    anom_col = f"{anomaly_param}_anomaly"
-    if anom_col not in dff.columns:
-        dff = detect_anomalies(dff, anomaly_param)
+    anom_col = f"{anomaly_param}_anomaly"   # precomputed for every parameter in enrich()
 
-    fig7 = px.scatter(
-        dff, x="year", y=anomaly_param,
-        color=anom_col,
-        color_discrete_map={True: "#c62828", False: "#1565c0"},
-        symbol=anom_col,
-        symbol_map={True: "x", False: "circle"},
-        opacity=0.7,
-        title=f"Anomaly Detection — {anomaly_param} (red × = anomaly, |z| > 3)",
-        labels={anomaly_param: anomaly_param.upper(),
-                "year": "Year", anom_col: "Anomaly"},
-        hover_data=["state", "location"],
-        height=440,
+    fig7 = session_figure(
+        "fig_anomaly", (filters_key, anomaly_param, st.session_state.get("render_mode")),
+        lambda: build_anomaly_fig(dff, anomaly_param),
     )
-    fig7.update_layout(plot_bgcolor="white", paper_bgcolor="white")
     n_anomalies = dff[anom_col].sum()
+    anom_rate = dff[anom_col].mean() * 100
     st.plotly_chart(fig7, use_container_width=True)
     warning_note(
         f"{n_anomalies} anomalous data points detected for {anomaly_param} "
-        f"({n_anomalies/len(dff)*100:.1f}% of filtered records). "
+        f"({anom_rate:.1f}% of filtered records). "
         "These represent values more than 3 standard deviations from the mean."
     )
 
     # ---- Download filtered data ----
     st.markdown("<br>", unsafe_allow_html=True)
-    csv_buf = io.StringIO()
-    dff.to_csv(csv_buf, index=False)
     st.download_button(
         label="📥 Download Filtered Dataset",
-        data=csv_buf.getvalue().encode("utf-8"),
+        data=filtered_csv_bytes(filters_key, dff),
         file_name="filtered_water_data.csv",
         mime="text/csv",
     )
@@ -999,175 +1508,15 @@ elif nav == SECTIONS[2]:
 elif nav == SECTIONS[3]:
     section_header("🏛️", "Government Initiatives & Organisations")
 
-    initiatives = [
-        {
-            "icon": "🌊",
-            "title": "Namami Gange Programme (NMCG)",
-            "ministry": "Ministry of Jal Shakti | Budget: ₹20,000 Cr | Launched: 2015",
-            "color": "#1565c0",
-            "points": [
-                "Flagship mission for comprehensive conservation and rejuvenation of River Ganga.",
-                "Covers sewage treatment plant (STP) construction with total capacity of 5,000+ MLD.",
-                "Afforestation of 30,000 hectares along the Ganga basin.",
-                "Ghat development and beautification across 97 towns.",
-                "Real-time water quality monitoring via online continuous monitoring systems (OCMS).",
-                "Industrial units prohibited from discharging untreated effluents.",
-                "Biodiversity conservation — Gangetic Dolphin as flagship species.",
-            ],
-        },
-        {
-            "icon": "🚰",
-            "title": "Jal Jeevan Mission (JJM)",
-            "ministry": "Ministry of Jal Shakti | Budget: ₹3.60 Lakh Cr | Launched: 2019",
-            "color": "#2e7d32",
-            "points": [
-                "Har Ghar Jal — tap water connection to every rural household by 2024.",
-                "As of 2025, over 14 crore (140 million) households connected.",
-                "Establishes 5-member Village Water & Sanitation Committees (VWSCs).",
-                "Water quality testing labs at district and sub-district levels.",
-                "Field testing kits (FTKs) distributed to grassroots workers (Swajal Sahayikas).",
-                "Source sustainability through aquifer management and rainwater harvesting.",
-                "Monitoring through JJM Dashboard and IoT-based sensors.",
-            ],
-        },
-        {
-            "icon": "🔬",
-            "title": "National Water Quality Monitoring Programme (NWQMP – CPCB)",
-            "ministry": "CPCB, MoEFCC | Est: 1978 | Stations: 2,500+",
-            "color": "#00838f",
-            "points": [
-                "Monitors 507 rivers, 154 lakes, 25 tanks, 17 ponds, 45 reservoirs and 10 creeks.",
-                "2,500+ monitoring stations across 28 states and 7 UTs.",
-                "Parameters monitored: temperature, pH, DO, BOD, coliforms, heavy metals, pesticides.",
-                "Monthly / quarterly sampling by State Pollution Control Boards (SPCBs).",
-                "Data published annually through CPCB reports and India-WRIS portal.",
-                "Basis for river classification (Class A to E) under BIS IS:2296.",
-            ],
-        },
-        {
-            "icon": "🏗️",
-            "title": "State Pollution Control Boards (SPCBs)",
-            "ministry": "Constituted under Water Act, 1974",
-            "color": "#6a1b9a",
-            "points": [
-                "Each state has its own SPCB / Pollution Control Committee (PCC).",
-                "Issue Consents to Establish (CTE) and Consents to Operate (CTO) to industries.",
-                "Enforce effluent discharge standards (ZLD norms for water-intensive sectors).",
-                "Monitor common effluent treatment plants (CETPs) in industrial clusters.",
-                "Coordinate with CPCB on national programs and data submission.",
-                "Impose closure orders and penalties for violations under EP Act, 1986.",
-            ],
-        },
-        {
-            "icon": "⚖️",
-            "title": "Water (Prevention & Control of Pollution) Act, 1974",
-            "ministry": "Parliament of India | Amended: 1988",
-            "color": "#c62828",
-            "points": [
-                "First comprehensive legislation to prevent and control water pollution in India.",
-                "Established CPCB at the central level and SPCBs at state level.",
-                "Prohibits discharge of polluting matter into streams, wells, sewers or land.",
-                "Section 25/26: Any new/existing industrial discharge requires SPCB consent.",
-                "Penalties: imprisonment up to 6 years + fine for violations.",
-                "Amended in 1988 to enhance penalty provisions.",
-                "Supplemented by the Environment Protection Act, 1986 for hazardous substances.",
-            ],
-        },
-        {
-            "icon": "🌿",
-            "title": "Atal Bhujal Yojana (ABY)",
-            "ministry": "Ministry of Jal Shakti | Budget: ₹6,000 Cr | Launched: 2020",
-            "color": "#558b2f",
-            "points": [
-                "Community-led groundwater management in 7 water-stressed states.",
-                "States: Gujarat, Haryana, Karnataka, Madhya Pradesh, Maharashtra, Rajasthan, UP.",
-                "Focuses on water budgeting at Gram Panchayat level.",
-                "Promotes demand-side management and groundwater recharge.",
-                "Incentive-based framework — states rewarded for reducing extraction.",
-            ],
-        },
-    ]
-
-    for idx, item in enumerate(initiatives):
-        with st.expander(f"{item['icon']}  {item['title']}", expanded=(idx == 0)):
-            st.markdown(
-                f"""
-                <div style="background:#f5f5f5;border-radius:8px;padding:8px 14px;
-                            margin-bottom:10px;font-size:13px;color:#546e7a;">
-                    📌 <b>{item['ministry']}</b>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-            for point in item["points"]:
-                st.markdown(
-                    f"""
-                    <div style="display:flex;align-items:flex-start;margin:6px 0;">
-                        <span style="color:{item['color']};font-size:18px;margin-right:10px;
-                                     line-height:1.4;">▸</span>
-                        <span style="font-size:14.5px;color:#37474f;line-height:1.6;">{point}</span>
-                    </div>
-                    """,
-                    unsafe_allow_html=True,
-                )
+    for idx, (item, html) in enumerate(zip(INITIATIVES, INITIATIVES_HTML)):
+        with st.expander(f"{item.icon}  {item.title}", expanded=(idx == 0)):
+            st.markdown(html, unsafe_allow_html=True)
 
     # ---- Timeline ----
     st.markdown("<br>", unsafe_allow_html=True)
     st.subheader("📅 Policy Timeline")
-    timeline_data = pd.DataFrame(
-        {
-            "Year": [1974, 1978, 1986, 1991, 2011, 2015, 2019, 2020, 2022],
-            "Event": [
-                "Water Act enacted",
-                "NWQMP launched by CPCB",
-                "Environment Protection Act",
-                "Ganga Action Plan II",
-                "National Water Policy revised",
-                "Namami Gange Programme",
-                "Jal Jeevan Mission launched",
-                "Atal Bhujal Yojana",
-                "JJM — Urban extended",
-            ],
-            "Category": [
-                "Legislation", "Monitoring", "Legislation",
-                "River Cleaning", "Policy",
-                "River Cleaning", "Rural Water Supply",
-                "Groundwater", "Urban Water Supply",
-            ],
-        }
-    )
-    color_map = {
-        "Legislation": "#c62828",
-        "Monitoring": "#1565c0",
-        "River Cleaning": "#2e7d32",
-        "Policy": "#6a1b9a",
-        "Rural Water Supply": "#00838f",
-        "Groundwater": "#558b2f",
-        "Urban Water Supply": "#0277bd",
-    }
-    fig_tl = px.scatter(
-        timeline_data, x="Year", y="Category",
-        color="Category", size=[15] * len(timeline_data),
-        hover_data=["Event"],
-        color_discrete_map=color_map,
-        title="Indian Water Policy & Initiative Timeline",
-        height=380,
-    )
-    fig_tl.update_traces(marker=dict(symbol="diamond", size=16))
-    fig_tl.update_layout(
-        plot_bgcolor="white", paper_bgcolor="white",
-        showlegend=False,
-        xaxis=dict(tickmode="linear", dtick=5),
-    )
-    for _, row in timeline_data.iterrows():
-        fig_tl.add_annotation(
-            x=row["Year"], y=row["Category"],
-            text=row["Event"], showarrow=True,
-            arrowhead=2, ax=0, ay=-30,
-            font=dict(size=10, color="#37474f"),
-            bgcolor="white", bordercolor="#bdbdbd", borderwidth=1,
-        )
-    st.plotly_chart(fig_tl, use_container_width=True)
+    st.plotly_chart(timeline_fig(st.session_state.get("render_mode", "webgl")),
+                    use_container_width=True)
 
 
 # =============================================================================
@@ -1224,38 +1573,9 @@ elif nav == SECTIONS[4]:
     # ---- Technology role ----
     st.subheader("💻 Role of Technology & Data Science in Water Governance")
 
-    tech_items = [
-        ("🛰️", "Remote Sensing & GIS",
-         "Satellite imagery detects algal blooms, turbidity changes and illegal discharge plumes "
-         "across large river basins without physical access."),
-        ("📡", "IoT & Real-time Sensors",
-         "Online Continuous Monitoring Systems (OCMS) installed on rivers and STPs transmit "
-         "live pH, DO, BOD and turbidity data to cloud dashboards."),
-        ("🤖", "Machine Learning & AI",
-         "Predictive models trained on historical water-quality data can forecast pollution events, "
-         "enabling proactive intervention by pollution control authorities."),
-        ("📊", "Open Data & Dashboards",
-         "Platforms like India-WRIS, CPCB data portal and apps like this one enable citizens, "
-         "researchers and policymakers to visualise and act on water-quality information."),
-        ("⚗️", "Advanced Treatment Tech",
-         "Membrane bioreactors (MBR), UV disinfection, and nano-filtration are being deployed "
-         "in Namami Gange STPs to achieve near-zero pollutant discharge."),
-    ]
-
-    cols_tech = st.columns(len(tech_items))
-    for col, (icon, title, desc) in zip(cols_tech, tech_items):
-        col.markdown(
-            f"""
-            <div style="background:white;border-radius:12px;padding:16px;
-                        box-shadow:0 3px 10px rgba(0,0,0,0.09);text-align:center;height:100%;">
-                <div style="font-size:36px;margin-bottom:8px;">{icon}</div>
-                <div style="font-weight:700;color:#1565c0;font-size:13px;
-                            margin-bottom:8px;">{title}</div>
-                <div style="font-size:12px;color:#546e7a;line-height:1.6;">{desc}</div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+    cols_tech = st.columns(len(TECH_ITEMS))
+    for col, card in zip(cols_tech, TECH_CARDS_HTML):
+        col.markdown(card, unsafe_allow_html=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
 